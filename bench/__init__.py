@@ -0,0 +1 @@
+"""Benchmark scaffolding for koroneStrap.py bench, kept out of the launcher module"""
@@ -0,0 +1,44 @@
+"""Synthetic version trees, FastFlags and URI corpora used by the bench suites and tests"""
+import os
+
+URIS_REALISTIC = [
+    "launchmode:play+gameinfo:" + "a" * 160 + "+launchtime:1700000000000+placelauncherurl:"
+    "https%3A%2F%2Fwww.pekora.zip%2FGame%2FPlaceLauncher.ashx%3Frequest%3DRequestGame%26placeId%3D1818"
+    "+browsertrackerid:123456+robloxLocale:en_us+gameLocale:en_us+channel:+clientversion:2021M",
+    "launchmode:play+gameinfo:" + "b" * 160 + "+placeId:1818+universeId:42+userId:7+clientversion:2020L",
+    "launchmode:edit+task:EditPlace+placeId:1818+universeId:42+clientversion:2021M",
+]
+URIS_ADVERSARIAL = [
+    "",
+    "+" * 10000,
+    "clientversion:" + "9" * 10000,
+    "+".join(f"unknownkey{i}:value{i}" for i in range(2000)),
+    "+".join(f"placeId:{i}" for i in range(2000)),
+    "placelauncherurl:" + "%41" * 20000,
+    "gameinfo:" + ":" * 10000 + "+clientversion:2021M",
+    "launchmode:play+gameinfo:\u00e9\u00e8\u4e2d\u6587+clientversion:2021M",
+]
+
+
+def make_fake_versions(home, count, years, executable, user="bench"):
+    """Create count version dirs, each with an empty client executable per year, under a fake ~/.wine prefix"""
+    root = os.path.join(home, ".wine", "drive_c", "users", user, "AppData", "Local", "Pekora", "Versions")
+    for i in range(count):
+        for year in years:
+            year_dir = os.path.join(root, f"version-{i:08x}", year)
+            os.makedirs(year_dir, exist_ok=True)
+            open(os.path.join(year_dir, executable), "wb").close()
+    return root
+
+
+def make_fake_fastflags(count):
+    flags = {}
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            flags[f"FFlagBenchFeature{i}"] = i % 2 == 0
+        elif kind == 1:
+            flags[f"DFIntBenchValue{i}"] = i * 7
+        else:
+            flags[f"FStringBenchName{i}"] = f"value-{i}"
+    return flags
@@ -0,0 +1,80 @@
+"""Thin pekora-player:// URI client for the koroneStrap launcher daemon.
+
+Forwards the URI to a running `koroneStrap.py --daemon` and falls back to the
+in-process launch path when no daemon is listening. Only cheap stdlib modules
+are imported here so a URI click does not pay for the full launcher.
+"""
+import json
+import os
+import socket
+import sys
+
+
+def get_daemon_socket_path():
+    """Must match koroneStrap.get_daemon_socket_path"""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "koroneStrap.sock")
+    return os.path.join(os.path.expanduser("~"), ".cache", "koroneStrap", "daemon.sock")
+
+
+def forward_uri(uri, trace=False):
+    """Send the URI to the daemon, returning its reply or None if it is not running"""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    request = {'action': "uri", 'uri': uri, 'trace': trace, 'env': dict(os.environ)}
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(1)
+        try:
+            sock.connect(get_daemon_socket_path())
+        except OSError:
+            return None
+        # Once connected the daemon owns the launch, so never fall back after this point
+        sock.settimeout(60)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+        try:
+            return json.loads(line)
+        except ValueError:
+            return {'exit_code': 1, 'output': "[!] Daemon closed the connection without a reply\n"}
+    finally:
+        sock.close()
+
+
+def main():
+    args = sys.argv[1:]
+    trace = "--trace" in args
+    if trace:
+        args.remove("--trace")
+    if args and args[0] == "--uri":
+        args = args[1:]
+    if not args:
+        print("Usage: koroneStrapClient.py [--trace] --uri pekora-player://...")
+        return 1
+    uri = args[0]
+
+    try:
+        reply = forward_uri(uri, trace)
+    except OSError as e:
+        print(f"[!] Daemon request failed: {e}")
+        return 1
+    if reply is not None:
+        output = reply.get('output', "")
+        if not sys.stdout.isatty():
+            import re
+            output = re.sub(r"\x1b\[[0-9;]*m", "", output)
+        sys.stdout.write(output)
+        return reply.get('exit_code', 1)
+
+    # No daemon running: launch in this process instead
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import koroneStrap
+    if trace:
+        koroneStrap.TRACE_ENABLED = True
+    return koroneStrap.traced_launch_uri(uri)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import koroneStrap
+
+
+@pytest.fixture
+def ks(tmp_path, monkeypatch):
+    """koroneStrap with HOME and every path derived from it moved under tmp_path"""
+    real_home = str(Path.home())
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USER", "tester")
+    monkeypatch.delenv("WINEPREFIX", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    for name, value in list(vars(koroneStrap).items()):
+        if isinstance(value, Path) and str(value).startswith(real_home):
+            monkeypatch.setattr(koroneStrap, name, Path(str(value).replace(real_home, str(home), 1)))
+        elif isinstance(value, str) and value.startswith(real_home + os.sep):
+            monkeypatch.setattr(koroneStrap, name, value.replace(real_home, str(home), 1))
+    monkeypatch.setattr(koroneStrap, "LEGACY_FASTFLAGS_FILES", [])
+    for name in ("_discovery_index", "_fastflags_store", "_wine_resolution", "_gpu_enumeration", "_sync_support"):
+        monkeypatch.setattr(koroneStrap, name, None)
+    monkeypatch.setattr(koroneStrap, "_layer_digests", {})
+    monkeypatch.setattr(koroneStrap, "_compiled_flags", {})
+    return koroneStrap
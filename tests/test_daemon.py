@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+from bench.fixtures import make_fake_versions
+
+
+def test_daemon_discovers_with_the_clients_wineprefix(ks, tmp_path, monkeypatch):
+    make_fake_versions(str(tmp_path / "other"), 1, ks.CLIENTSETTINGS_YEARS, ks.CLIENT_EXECUTABLE, user="tester")
+    prefix = str(tmp_path / "other" / ".wine")
+    found = []
+
+    def fake_launch(uri, base_env=None, **trace_fields):
+        found.append(ks.find_executable("2021M"))
+        return 0
+
+    monkeypatch.setattr(ks, "traced_launch_uri", fake_launch)
+    env = dict(os.environ, WINEPREFIX=prefix)
+
+    reply = ks._serve_daemon_request({'action': "uri", 'uri': "pekora-player://", 'env': env})
+
+    assert reply['exit_code'] == 0
+    assert found[0] and found[0].startswith(prefix + os.sep)
+    # The daemon's own environment is used again once the request is served
+    assert ks.find_executable("2021M") is None
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the fake Wine is a shell script")
+def test_daemon_resolves_wine_with_the_clients_environment(ks, tmp_path, monkeypatch):
+    bin_dir = tmp_path / "client-bin"
+    bin_dir.mkdir()
+    for name in ("wine", "wine-client"):
+        wine = bin_dir / name
+        wine.write_text("#!/bin/sh\necho wine-9.0\n")
+        wine.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    monkeypatch.delenv("KORONESTRAP_WINE", raising=False)
+    found = []
+
+    def fake_launch(uri, base_env=None, **trace_fields):
+        found.append(ks.get_wine_command())
+        return 0
+
+    monkeypatch.setattr(ks, "traced_launch_uri", fake_launch)
+    for extra in ({'PATH': str(bin_dir)}, {'KORONESTRAP_WINE': str(bin_dir / "wine-client")}):
+        env = dict(os.environ, **extra)
+        ks._serve_daemon_request({'action': "uri", 'uri': "pekora-player://", 'env': env})
+
+    assert found == [str(bin_dir / "wine"), str(bin_dir / "wine-client")]
+    assert ks.get_wine_command() is None
@@ -0,0 +1,53 @@
+import os
+import stat
+import sys
+
+import pytest
+
+from bench.fixtures import make_fake_versions
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reflinks and read-only hardlinks are Linux-only")
+
+
+def make_duplicates(ks, count=3):
+    root = make_fake_versions(os.environ["HOME"], count, ks.CLIENTSETTINGS_YEARS, ks.CLIENT_EXECUTABLE, user="tester")
+    data = os.urandom(64 * 1024)
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, f"version-{i:08x}", "2021M", "content.pak")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def test_without_reflinks_nothing_is_linked_unless_asked(ks, monkeypatch):
+    paths = make_duplicates(ks)
+    monkeypatch.setattr(ks, "_reflink_file", lambda src, dst: False)
+    assert ks.dedupe_command([]) == 1
+    assert len({os.stat(path).st_ino for path in paths}) == len(paths)
+
+
+def test_hardlinks_are_read_only_and_keep_folder_mtimes(ks):
+    paths = make_duplicates(ks)
+    for i, path in enumerate(paths):
+        os.utime(path, ns=(1_000_000_000 * (i + 1),) * 2)
+        os.utime(os.path.dirname(path), ns=(1_000_000_000 * (i + 1),) * 2)
+    assert ks.dedupe_command(["--hardlink"]) == 0
+    assert len({os.stat(path).st_ino for path in paths}) == 1
+    assert not any(os.stat(path).st_mode & stat.S_IWUSR for path in paths)
+    assert [os.stat(os.path.dirname(path)).st_mtime_ns for path in paths] == [1_000_000_000 * (i + 1) for i in range(3)]
+    assert os.stat(paths[0]).st_mtime_ns == 1_000_000_000
+
+
+def test_writable_restores_only_linked_files(ks):
+    paths = make_duplicates(ks)
+    ks.dedupe_command(["--hardlink"])
+    unrelated = os.path.join(os.path.dirname(paths[0]), "other.pak")
+    with open(unrelated, "wb") as f:
+        f.write(b"x")
+    os.link(unrelated, unrelated + ".link")
+    os.chmod(unrelated, 0o444)
+    assert ks.dedupe_command(["--writable"]) == 0
+    assert all(os.stat(path).st_mode & stat.S_IWUSR for path in paths)
+    assert not os.stat(unrelated).st_mode & stat.S_IWUSR
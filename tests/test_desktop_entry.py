@@ -0,0 +1,43 @@
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="desktop entries are Linux-only")
+
+
+def read_exec(ks):
+    for line in ks.ENTRY_FILE.read_text().splitlines():
+        if line.startswith("Exec="):
+            return line[len("Exec="):]
+
+
+def test_entry_runs_thin_client_next_to_script(ks, tmp_path):
+    script = tmp_path / "install" / "koroneStrap.py"
+    script.parent.mkdir()
+    script.touch()
+    (script.parent / "koroneStrapClient.py").touch()
+    ks.create_desktop_entry(str(script))
+    assert read_exec(ks) == f"python3 {script.parent / 'koroneStrapClient.py'} --uri %u"
+
+
+def test_entry_falls_back_to_script_without_client(ks, tmp_path):
+    script = tmp_path / "koroneStrap.py"
+    script.touch()
+    ks.create_desktop_entry(str(script))
+    assert read_exec(ks) == f"python3 {script} --uri %u"
+
+
+def test_entry_prefers_built_zipapp(ks, tmp_path):
+    script = tmp_path / "koroneStrap.py"
+    script.touch()
+    (tmp_path / "koroneStrapClient.py").touch()
+    ks.ZIPAPP_FILE.parent.mkdir(parents=True)
+    ks.ZIPAPP_FILE.touch()
+    ks.create_desktop_entry(str(script))
+    assert read_exec(ks) == f"{sys.executable} {ks.ZIPAPP_FILE} --uri %u"
+
+
+def test_build_zipapp_rewrites_existing_entry(ks, tmp_path):
+    ks.create_desktop_entry(ks.__file__)
+    ks.build_zipapp()
+    assert read_exec(ks) == f"{sys.executable} {ks.ZIPAPP_FILE} --uri %u"
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import http.server
+import os
+import threading
+
+import pytest
+
+PAYLOAD = os.urandom(300 * 1024)
+DIGEST = hashlib.sha256(PAYLOAD).hexdigest()
+ETAG = '"v1"'
+
+
+def write_part(dest, data, validator=ETAG):
+    with open(dest + ".part", "wb") as f:
+        f.write(data)
+    if validator:
+        with open(dest + ".part.json", "w") as f:
+            json.dump({"validator": validator}, f)
+
+
+class FlakyServer:
+    """Local HTTP server that can cut responses short or ignore Range requests"""
+    def __init__(self, drops=0, drop_after=10000, ignore_range=False, etag=ETAG):
+        self.drops = drops
+        self.drop_after = drop_after
+        self.ignore_range = ignore_range
+        self.etag = etag
+        self.requests = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                rng = self.headers.get("Range")
+                revalidated = server.etag and self.headers.get("If-None-Match") == server.etag
+                # Logged before replying, so the client cannot send its next request first
+                with server.lock:
+                    server.requests.append("If-None-Match" if revalidated else rng)
+                if revalidated:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                start, end = 0, len(PAYLOAD) - 1
+                if_range = self.headers.get("If-Range")
+                if rng and not server.ignore_range and (if_range is None or if_range == server.etag):
+                    first, _, last = rng.split("=", 1)[1].partition("-")
+                    start, end = int(first), int(last) if last else end
+                    if start >= len(PAYLOAD):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+                else:
+                    self.send_response(200)
+                if server.etag:
+                    self.send_header("ETag", server.etag)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.end_headers()
+                body = PAYLOAD[start:end + 1]
+                with server.lock:
+                    drop = server.drops > 0 and len(body) > server.drop_after
+                    server.drops -= drop
+                # A dropped connection sends part of the body and closes despite the Content-Length
+                self.wfile.write(body[:server.drop_after] if drop else body)
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/artifact.bin"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(ks, monkeypatch):
+    monkeypatch.setattr(ks.time, "sleep", lambda seconds: None)
+
+
+def test_resumes_after_dropped_connection(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    with FlakyServer(drops=2) as server:
+        result = ks.download_file(server.url, dest, DIGEST)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert result['sha256'] == DIGEST
+    assert server.requests == [None, "bytes=10000-", "bytes=20000-"]
+    assert not os.path.exists(dest + ".part")
+
+
+def test_restarts_when_server_ignores_range(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    write_part(dest, PAYLOAD[:5000])
+    with FlakyServer(ignore_range=True) as server:
+        ks.download_file(server.url, dest, DIGEST)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert server.requests == ["bytes=5000-"]
+
+
+def test_complete_part_file_accepted_on_416(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    write_part(dest, PAYLOAD)
+    with FlakyServer() as server:
+        result = ks.download_file(server.url, dest, DIGEST)
+    assert result['size'] == len(PAYLOAD)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert server.requests == [f"bytes={len(PAYLOAD)}-"]
+
+
+def test_part_of_changed_upstream_file_is_restarted(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    write_part(dest, os.urandom(5000), validator='"v0"')
+    with FlakyServer() as server:
+        ks.download_file(server.url, dest, DIGEST)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert server.requests == ["bytes=5000-"]
+    assert not os.path.exists(dest + ".part.json")
+
+
+def test_part_without_validator_is_discarded(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    write_part(dest, os.urandom(5000), validator=None)
+    with FlakyServer() as server:
+        ks.download_file(server.url, dest, DIGEST)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert server.requests == [None]
+
+
+def test_part_longer_than_shrunk_file_is_discarded_on_416(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    write_part(dest, PAYLOAD + b"stale tail")
+    with FlakyServer() as server:
+        ks.download_file(server.url, dest, DIGEST)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert server.requests == [f"bytes={len(PAYLOAD) + 10}-", None]
+
+
+def test_checksum_mismatch_deletes_partial(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    with FlakyServer() as server:
+        with pytest.raises(ks.DownloadError):
+            ks.download_file(server.url, dest, "0" * 64)
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part")
+
+
+def test_segmented_retries_dropped_segments(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    with FlakyServer(drops=3, drop_after=4096) as server:
+        result = ks.download_segmented(server.url, dest, DIGEST, connections=4, min_segment=64 * 1024)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert result['sha256'] == DIGEST
+    # The probe, four segments and a retry for each of the dropped requests
+    assert len(server.requests) == 1 + 4 + 3
+    assert not os.path.exists(dest + ".segments")
+
+
+def test_segmented_falls_back_when_server_ignores_range(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    with FlakyServer(ignore_range=True) as server:
+        ks.download_segmented(server.url, dest, DIGEST, connections=4, min_segment=64 * 1024)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert server.requests == ["bytes=0-0", None]
+
+
+def test_segmented_resumes_existing_part_file(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    write_part(dest, PAYLOAD)
+    with FlakyServer() as server:
+        ks.download_segmented(server.url, dest, DIGEST, connections=4, min_segment=64 * 1024)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert server.requests == [f"bytes={len(PAYLOAD)}-"]
+
+
+def test_segmented_checksum_mismatch_deletes_partial(ks, tmp_path):
+    dest = str(tmp_path / "artifact.bin")
+    with FlakyServer() as server:
+        with pytest.raises(ks.DownloadError):
+            ks.download_segmented(server.url, dest, "0" * 64, connections=4, min_segment=64 * 1024)
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".segments")
+
+
+def test_artifact_revalidates_with_one_conditional_get(ks):
+    with FlakyServer() as server:
+        first = ks.fetch_artifact(server.url, DIGEST)
+        second = ks.fetch_artifact(server.url, DIGEST)
+        server.etag = '"v2"'
+        third = ks.fetch_artifact(server.url, DIGEST)
+    assert (first['cached'], second['cached'], third['cached']) == (False, True, False)
+    assert server.requests == [None, "If-None-Match", None]
+    assert ks.load_artifact_manifest()['entries'][server.url]['etag'] == '"v2"'
+
+
+def test_segmented_fails_up_front_when_space_cannot_be_reserved(ks, tmp_path, monkeypatch):
+    import errno
+
+    def no_space(fd, offset, length):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(ks.os, "posix_fallocate", no_space, raising=False)
+    dest = str(tmp_path / "artifact.bin")
+    with FlakyServer() as server:
+        with pytest.raises(ks.DownloadError):
+            ks.download_segmented(server.url, dest, DIGEST, connections=4, min_segment=64 * 1024)
+    assert server.requests == ["bytes=0-0"]
+    assert not os.path.exists(dest + ".segments")
@@ -0,0 +1,60 @@
+import json
+import os
+
+from bench.fixtures import make_fake_versions
+
+
+def test_launch_apply_migrates_legacy_fastflags(ks, tmp_path, monkeypatch):
+    legacy = tmp_path / "old_install" / "fastFlags.json"
+    legacy.parent.mkdir()
+    legacy.write_text(json.dumps({"FFlagLegacy": True}))
+    monkeypatch.setattr(ks, "LEGACY_FASTFLAGS_FILES", [str(legacy)])
+    root = make_fake_versions(os.environ["HOME"], 1, ks.CLIENTSETTINGS_YEARS, ks.CLIENT_EXECUTABLE, user="tester")
+
+    assert ks.apply_fastflags()
+
+    assert legacy.exists()
+    assert json.loads(open(ks.FASTFLAGS_FILE).read()) == {"FFlagLegacy": True}
+    settings = os.path.join(root, "version-00000000", "2021M", "ClientSettings", "ClientAppSettings.json")
+    assert json.load(open(settings)) == {"FFlagLegacy": True}
+
+
+def test_legacy_fastflags_are_migrated_only_once(ks, tmp_path, monkeypatch):
+    legacy = tmp_path / "old_install" / "fastFlags.json"
+    legacy.parent.mkdir()
+    legacy.write_text(json.dumps({"FFlagLegacy": True}))
+    monkeypatch.setattr(ks, "LEGACY_FASTFLAGS_FILES", [str(legacy)])
+
+    assert ks.migrate_legacy_fastflags(ks.FASTFLAGS_FILE)
+    os.remove(ks.FASTFLAGS_FILE)
+
+    assert not ks.migrate_legacy_fastflags(ks.FASTFLAGS_FILE)
+    assert not os.path.exists(ks.FASTFLAGS_FILE)
+
+
+def test_bench_sandbox_leaves_legacy_fastflags_alone(ks, tmp_path, monkeypatch):
+    legacy = tmp_path / "old_install" / "fastFlags.json"
+    legacy.parent.mkdir()
+    legacy.write_text(json.dumps({"FFlagLegacy": True}))
+    monkeypatch.setattr(ks, "LEGACY_FASTFLAGS_FILES", [str(legacy)])
+    sandbox = tmp_path / "sandbox"
+    sandbox.mkdir()
+
+    with ks._bench_sandbox(str(sandbox)):
+        assert ks.get_flag_layers("version-0", "2021M", {})[0].startswith(str(sandbox))
+        assert str(ks.COMPILED_FLAGS_DIR).startswith(str(sandbox))
+
+    assert legacy.exists()
+    assert not os.path.exists(ks.FASTFLAGS_FILE)
+
+
+def test_compile_caches_keep_one_entry_per_layer_stack(ks):
+    store = ks.get_fastflags_store()
+    for i in range(5):
+        # A different size each time, so coarse mtimes cannot hide an edit
+        store.set("FStringEdit", "x" * i)
+        store.flush()
+        data, _ = ks.compile_fastflags((ks.FASTFLAGS_FILE,))
+        assert json.loads(data) == {"FStringEdit": "x" * i}
+    assert len(ks._compiled_flags) == 1
+    assert len(ks._layer_digests) == 1
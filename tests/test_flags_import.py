@@ -0,0 +1,93 @@
+import io
+import json
+import random
+
+import pytest
+
+DOCUMENT = {
+    "FStringEscapes": "quote \" backslash \\ slash / tab \t newline \n unicode é 😀",
+    "DFIntNegative": -1234567890,
+    "FIntExponent": 12,
+    "FLogFloat": 1.5e-7,
+    "FFlagTrue": True,
+    "FFlagFalse": False,
+    "": None,
+    "Nested": {"a": [1, 2.5e10, {"b": "}"}]},
+}
+
+
+class Trickle(io.StringIO):
+    """A stream that never returns more than `size` characters per read"""
+    def __init__(self, text, size):
+        super().__init__(text)
+        self.size = size
+
+    def read(self, n=-1):
+        return super().read(self.size)
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 8))
+def test_round_trips_json_dumps_at_tiny_chunk_sizes(ks, chunk_size):
+    rng = random.Random(chunk_size)
+    for indent in (None, 2):
+        text = json.dumps(DOCUMENT, indent=indent, ensure_ascii=rng.random() < 0.5)
+        pairs = list(ks.iter_json_object(Trickle(text, chunk_size), chunk_size))
+        assert pairs == list(DOCUMENT.items())
+
+
+@pytest.mark.parametrize("number", ["13e5", "-0.25E-3", "1234567890123", "1.5e", "-"])
+def test_numbers_split_across_chunks_are_not_cut_short(ks, number):
+    document = '{"FIntValue": ' + number + '}'
+    try:
+        expected = list(json.loads(document).items())
+    except json.JSONDecodeError:
+        with pytest.raises(json.JSONDecodeError):
+            list(ks.iter_json_object(Trickle(document, 1), 1))
+    else:
+        assert list(ks.iter_json_object(Trickle(document, 1), 1)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "[]",
+    "{",
+    '{"a" 1}',
+    '{"a": 1,}',
+    '{"a": 1 "b": 2}',
+    '{1: 2}',
+    '{"a": 1}}',
+    '{"a": 1} {}',
+    '{"a": "unterminated}',
+    '{"a": tru}',
+])
+def test_malformed_documents_raise(ks, text):
+    for chunk_size in (1, 3, 65536):
+        with pytest.raises(json.JSONDecodeError):
+            list(ks.iter_json_object(Trickle(text, chunk_size), chunk_size))
+
+
+def test_stream_import_counts_added_overridden_and_rejected(ks):
+    store = ks.get_fastflags_store()
+    store.set("FFlagExisting", False)
+    text = json.dumps({
+        "FFlagExisting": True,
+        "DFIntNew": "42",
+        "FStringName": "value",
+        "FFlagBad": 7,
+        "FIntBad": "not a number",
+        "FStringBad": 3,
+        "DFFlagList": [True],
+    })
+
+    counts = ks.import_fastflags_stream(store, Trickle(text, 5))
+
+    assert counts == (2, 1, 4)
+    assert store.flags == {"FFlagExisting": True, "DFIntNew": 42, "FStringName": "value"}
+
+
+def test_malformed_stream_leaves_the_store_untouched(ks):
+    store = ks.get_fastflags_store()
+    store.set("FFlagExisting", True)
+    with pytest.raises(json.JSONDecodeError):
+        ks.import_fastflags_stream(store, io.StringIO('{"FFlagNew": true, "FIntBroken": }'))
+    assert store.flags == {"FFlagExisting": True}
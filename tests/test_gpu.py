@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="GPU selection reads Linux sysfs")
+
+GIB = 1024 ** 3
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    root = tmp_path / "sys"
+
+    def add(card, slot, vendor, driver, boot_vga, vram=None):
+        device = root / "devices" / "pci0000:00" / slot
+        (device / "drm" / f"renderD{128 + card}").mkdir(parents=True)
+        (device / "vendor").write_text(vendor + "\n")
+        (device / "device").write_text("0x1234\n")
+        (device / "boot_vga").write_text(f"{int(boot_vga)}\n")
+        if vram is not None:
+            (device / "mem_info_vram_total").write_text(f"{vram}\n")
+        driver_dir = root / "bus" / "pci" / "drivers" / driver
+        driver_dir.mkdir(parents=True, exist_ok=True)
+        os.symlink(driver_dir, device / "driver")
+        drm = root / "class" / "drm" / f"card{card}"
+        drm.mkdir(parents=True)
+        os.symlink(device, drm / "device")
+
+    add.root = str(root)
+    return add
+
+
+def selection(ks, root):
+    gpus = ks.enumerate_gpus(root)
+    gpu = ks.select_gpu(gpus, "auto")
+    return gpu, ks.get_gpu_env(gpu, gpus)
+
+
+def test_hybrid_laptop_offloads_to_the_nvidia_gpu(ks, sysfs):
+    sysfs(0, "0000:00:02.0", "0x8086", "i915", boot_vga=True)
+    sysfs(1, "0000:01:00.0", "0x10de", "nvidia", boot_vga=False)
+    gpu, env = selection(ks, sysfs.root)
+    assert gpu['slot'] == "0000:01:00.0"
+    assert env["__NV_PRIME_RENDER_OFFLOAD"] == "1"
+
+
+def test_hybrid_amd_laptop_offloads_with_dri_prime(ks, sysfs):
+    sysfs(0, "0000:05:00.0", "0x1002", "amdgpu", boot_vga=True, vram=512 * 1024 ** 2)
+    sysfs(1, "0000:03:00.0", "0x1002", "amdgpu", boot_vga=False, vram=8 * GIB)
+    gpu, env = selection(ks, sysfs.root)
+    assert gpu['slot'] == "0000:03:00.0"
+    assert env == {"DRI_PRIME": "pci-0000_03_00_0"}
+
+
+@pytest.mark.parametrize("dgpu,igpu", [
+    (("0000:03:00.0", "0x1002", "amdgpu", 16 * GIB), ("0000:0e:00.0", "0x1002", "amdgpu", 512 * 1024 ** 2)),
+    (("0000:01:00.0", "0x10de", "nvidia", None), ("0000:00:02.0", "0x8086", "i915", None)),
+])
+def test_desktop_booted_on_its_dgpu_keeps_it(ks, sysfs, dgpu, igpu):
+    sysfs(0, dgpu[0], dgpu[1], dgpu[2], boot_vga=True, vram=dgpu[3])
+    sysfs(1, igpu[0], igpu[1], igpu[2], boot_vga=False, vram=igpu[3])
+    gpu, env = selection(ks, sysfs.root)
+    assert gpu['slot'] == dgpu[0]
+    assert env == {}
+
+
+def test_single_gpu_sets_no_offload_variables(ks, sysfs):
+    sysfs(0, "0000:00:02.0", "0x8086", "i915", boot_vga=True)
+    gpu, env = selection(ks, sysfs.root)
+    assert gpu['vendor'] == "intel" and not gpu['discrete']
+    assert env == {}
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+from bench.fixtures import make_fake_versions
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="prefix clones and shader caches are Linux-only")
+
+
+def test_hardlinked_clone_shares_only_client_binaries(ks, tmp_path, monkeypatch):
+    monkeypatch.setattr(ks, "_reflink_file", lambda src, dst: False)
+    root = make_fake_versions(os.environ["HOME"], 1, ks.CLIENTSETTINGS_YEARS, ks.CLIENT_EXECUTABLE, user="tester")
+    prefix = os.path.join(os.environ["HOME"], ".wine")
+    system32 = os.path.join(prefix, "drive_c", "windows", "system32")
+    os.makedirs(system32)
+    for path in (os.path.join(system32, "kernel32.dll"), os.path.join(prefix, "user.reg")):
+        with open(path, "wb") as f:
+            f.write(b"data")
+    clone = str(tmp_path / "clone")
+
+    stats = ks.clone_prefix(prefix, clone)
+
+    def same(rel):
+        return os.stat(os.path.join(prefix, rel)).st_ino == os.stat(os.path.join(clone, rel)).st_ino
+
+    exe = os.path.relpath(os.path.join(root, "version-00000000", "2021M", ks.CLIENT_EXECUTABLE), prefix)
+    assert stats['mode'] == "hardlink"
+    assert same(exe)
+    assert not same(os.path.join("drive_c", "windows", "system32", "kernel32.dll"))
+    assert not same("user.reg")
+
+
+def test_instances_get_their_own_shader_cache(ks, tmp_path):
+    exe = os.path.join(str(tmp_path), "prefix", "drive_c", "Versions", "version-1", "2021M", ks.CLIENT_EXECUTABLE)
+    shared = ks.get_shader_cache_dir("version-1", "2021M")
+    shared.mkdir(parents=True)
+    (shared / "ProjectXPlayerBeta.dxvk-cache").write_bytes(b"cache")
+    envs = [{}, {}]
+
+    for env, number in zip(envs, (1, 2)):
+        ks.apply_shader_cache(env, exe, str(tmp_path / f"clone-{number}"))
+
+    dirs = [env["DXVK_STATE_CACHE_PATH"] for env in envs]
+    assert dirs[0] != dirs[1]
+    assert all(open(os.path.join(d, "ProjectXPlayerBeta.dxvk-cache"), "rb").read() == b"cache" for d in dirs)
+    assert envs[0]["MESA_SHADER_CACHE_DIR"] == envs[1]["MESA_SHADER_CACHE_DIR"]
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from bench.fixtures import make_fake_versions
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+
+
+def test_measure_refuses_while_a_client_runs_in_the_prefix(ks, monkeypatch):
+    root = make_fake_versions(os.environ["HOME"], 1, ks.CLIENTSETTINGS_YEARS, ks.CLIENT_EXECUTABLE, user="tester")
+    exe = os.path.join(root, "version-00000000", "2021M", ks.CLIENT_EXECUTABLE)
+    stopped = []
+    monkeypatch.setattr(ks, "get_wine_command", lambda: "wine")
+    monkeypatch.setattr(ks, "prewarm_stop", lambda prefix=None: stopped.append(prefix))
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)", "Z:" + exe.replace("/", "\\")])
+    try:
+        time.sleep(0.2)
+        assert ks.prewarm_measure(ks.get_prefix_for_path(exe)) is False
+    finally:
+        process.kill()
+        process.wait()
+    assert stopped == []
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+from bench.fixtures import make_fake_versions
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="shader caches are Linux-only")
+
+
+def test_launch_without_wine_leaves_no_shader_cache(ks, monkeypatch):
+    make_fake_versions(os.environ["HOME"], 1, ks.CLIENTSETTINGS_YEARS, ks.CLIENT_EXECUTABLE, user="tester")
+    monkeypatch.setattr(ks, "get_wine_command", lambda: None)
+
+    assert ks.launch_version("2021M", interactive=False) == 1
+
+    assert not ks.SHADER_CACHE_DIR.exists()
+    assert ks.load_shader_stats() == {}
+
+
+def test_seeding_skips_a_sibling_removed_mid_scan(ks, monkeypatch):
+    ks.get_shader_cache_dir("version-0", "2021M").mkdir(parents=True)
+    cache_dir = ks.get_shader_cache_dir("version-1", "2021M")
+    cache_dir.mkdir()
+    real_listdir = os.listdir
+
+    def listdir(path):
+        if path.endswith("version-0"):
+            raise FileNotFoundError(path)
+        return real_listdir(path)
+
+    monkeypatch.setattr(ks.os, "listdir", listdir)
+    assert ks._seed_shader_cache(cache_dir, "2021M") is None
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="supervised launches are Linux only")
+
+
+def test_supervise_subcommand_runs_and_records_the_client(ks, tmp_path):
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "koroneStrap.py")
+    client = [sys.executable, "-c", "print('client output')"]
+
+    result = subprocess.run([sys.executable, script, "supervise", "2021M", "--"] + client,
+                            env=dict(os.environ), capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "client output" in ks.get_launch_log_path("2021M").read_text()
+    record = json.loads(ks.LAUNCH_HISTORY_FILE.read_text().splitlines()[-1])
+    assert record['cmd'] == client and record['exit_code'] == 0
+
+
+def test_frozen_build_spawns_the_supervise_subcommand(ks, monkeypatch):
+    spawned = []
+
+    class FakePopen:
+        def __init__(self, cmd, **kwargs):
+            spawned.append(cmd)
+
+    monkeypatch.setattr(sys, "frozen", True, raising=False)
+    monkeypatch.setattr(subprocess, "Popen", FakePopen)
+
+    ks.spawn_supervised(["wine", "client.exe"], {}, "2020L")
+
+    assert spawned == [[sys.executable, "supervise", "2020L", "--", "wine", "client.exe"]]
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from bench.fixtures import make_fake_versions
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+
+
+def age(path, days):
+    stamp = time.time() - days * 86400
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in filenames + dirnames:
+            os.utime(os.path.join(dirpath, name), (stamp, stamp))
+    os.utime(path, (stamp, stamp))
+
+
+@pytest.fixture
+def versions(ks):
+    root = make_fake_versions(os.environ["HOME"], 5, ks.CLIENTSETTINGS_YEARS, ks.CLIENT_EXECUTABLE, user="tester")
+    dirs = [os.path.join(root, f"version-{i:08x}") for i in range(5)]
+    # version 0 is the newest (active), 1..3 are older installs, 4 is an update still being unpacked
+    for i, days in enumerate([1, 10, 20, 30, 40]):
+        age(dirs[i], days)
+    for year in ks.CLIENTSETTINGS_YEARS:
+        os.remove(os.path.join(dirs[4], year, ks.CLIENT_EXECUTABLE))
+    os.utime(dirs[3], None)
+    return dirs
+
+
+def test_prune_keeps_newest_inactive_recent_and_incomplete(ks, versions):
+    assert ks.versions_command(["prune"]) == 0
+    remaining = [os.path.exists(ver) for ver in versions]
+    # 0 active, 1 kept by the default --keep 1, 2 pruned, 3 touched recently, 4 has no executable
+    assert remaining == [True, True, False, True, True]
+
+
+def test_running_wine_client_protects_its_version(ks, versions):
+    ver = versions[2]
+    exe = os.path.join(ver, "2021M", ks.CLIENT_EXECUTABLE)
+    prefix = ks.get_prefix_for_path(ver)
+    windows_exe = "C:\\" + os.path.relpath(exe, os.path.join(prefix, "drive_c")).replace("/", "\\")
+    unix_exe = "Z:" + exe.replace("/", "\\")
+    for arg in (windows_exe, unix_exe):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)", arg])
+        try:
+            time.sleep(0.2)
+            assert ks.get_running_version_dirs(versions) == {ver}
+        finally:
+            process.kill()
+            process.wait()